@@ -8,17 +8,25 @@ Modern hacker-style CLI with colorful themed output and emojis.
 import os
 import sys
 import json
+import shutil
 from datetime import datetime
 from colorama import Fore, Style, init
 
-# Enable ANSI colors on Windows
-init(autoreset=True)
+# Enable ANSI colors on Windows; strip escape codes when output is redirected
+_STDOUT_IS_TTY = sys.stdout.isatty()
+init(autoreset=True, strip=not _STDOUT_IS_TTY, convert=(sys.platform == 'win32' and _STDOUT_IS_TTY))
+
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import ANSI
+except ImportError:
+    PromptSession = None
 
 try:
     from scanner.network_scanner import scan_network_menu
     from visualizer.topology_visualizer import TopologyVisualizer
     from sniffer.packet_sniffer import PacketSniffer
-    from utils.helpers import create_directories, validate_root_access, print_banner
+    from utils.helpers import create_directories, validate_root_access, print_banner, dump_json, warm_up_jit
 except ImportError as e:
     print(Fore.RED + Style.BRIGHT + f"Error importing modules: {e}")
     print(Fore.RED + "Please ensure all required modules are in the correct directories")
@@ -29,36 +37,57 @@ class NetworkAnalyzerSuite:
         self.topology_visualizer = TopologyVisualizer()
         self.sniffer = PacketSniffer()
         self.create_output_directories()
+        # Pay any Numba compile/cache-load cost at launch, not on first visualize
+        warm_up_jit()
+        self._needs_full_redraw = True
+        self._terminal_size = shutil.get_terminal_size()
+        self._prompt_session = PromptSession() if PromptSession and sys.stdin.isatty() else None
 
     def create_output_directories(self):
         directories = ['output', 'demo']
         create_directories(directories)
 
+    def _write_lines(self, parts):
+        # One write per screen instead of one print() per line; reset after each
+        # line so styles don't bleed the way autoreset would have prevented
+        sys.stdout.write("".join(part + Style.RESET_ALL + "\n" for part in parts))
+        sys.stdout.flush()
+
     def print_header(self):
-        print(Fore.LIGHTGREEN_EX + Style.BRIGHT + "\n" + "═"*70)
-        print(Fore.CYAN + Style.BRIGHT + "{:^70}".format("🦈  NetworkAnalyzerSuite  👁️"))
-        print(Fore.LIGHTYELLOW_EX + Style.NORMAL + "{:^70}".format("Hack the network. Visualize the unknown."))
-        print("{:^70}".format(""))
-        print(Fore.LIGHTCYAN_EX + Style.BRIGHT + "{:^70}".format("🔍 Scan   |   🌐 Topology   |   🤖 Sniffer"))
-        print("{:^70}".format(""))
-        print(Fore.MAGENTA + Style.BRIGHT + "{:^70}".format("Developed with ❤️  by Anil Yadav (Ethical Hacker)"))
-        print(Fore.LIGHTGREEN_EX + Style.BRIGHT + "═"*70 + "\n")
+        self._write_lines([
+            Fore.LIGHTGREEN_EX + Style.BRIGHT + "\n" + "═"*70,
+            Fore.CYAN + Style.BRIGHT + "{:^70}".format("🦈  NetworkAnalyzerSuite  👁️"),
+            Fore.LIGHTYELLOW_EX + Style.NORMAL + "{:^70}".format("Hack the network. Visualize the unknown."),
+            "{:^70}".format(""),
+            Fore.LIGHTCYAN_EX + Style.BRIGHT + "{:^70}".format("🔍 Scan   |   🌐 Topology   |   🤖 Sniffer"),
+            "{:^70}".format(""),
+            Fore.MAGENTA + Style.BRIGHT + "{:^70}".format("Developed with ❤️  by Anil Yadav (Ethical Hacker)"),
+            Fore.LIGHTGREEN_EX + Style.BRIGHT + "═"*70 + "\n",
+        ])
 
     def print_main_menu(self, last_action=None):
-        print(Fore.LIGHTBLUE_EX + Style.BRIGHT + "\n" + "═"*50)
-        print(Fore.LIGHTWHITE_EX + Style.BRIGHT + "{:^50}".format("🔧 MAIN MENU 🔧"))
-        print(Fore.LIGHTBLUE_EX + Style.BRIGHT + "═"*50)
         options = [
             "1. Scan Network & Save Results",
             "2. Visualize Network Topology",
             "3. Start Packet Sniffer (Live Logs)",
             "4. Exit"
         ]
-        for opt in options:
-            print(Fore.LIGHTCYAN_EX + f"   {opt}")
-        print(Fore.LIGHTBLUE_EX + Style.BRIGHT + "═"*50)
+        parts = [
+            Fore.LIGHTBLUE_EX + Style.BRIGHT + "\n" + "═"*50,
+            Fore.LIGHTWHITE_EX + Style.BRIGHT + "{:^50}".format("🔧 MAIN MENU 🔧"),
+            Fore.LIGHTBLUE_EX + Style.BRIGHT + "═"*50,
+        ]
+        parts.extend(Fore.LIGHTCYAN_EX + f"   {opt}" for opt in options)
+        parts.append(Fore.LIGHTBLUE_EX + Style.BRIGHT + "═"*50)
         if last_action:
-            print(Fore.YELLOW + Style.BRIGHT + f"Last: {last_action}\n")
+            parts.append(Fore.YELLOW + Style.BRIGHT + f"Last: {last_action}\n")
+        self._write_lines(parts)
+
+    def read_choice(self, message):
+        # prompt_toolkit adds line editing and history when installed
+        if self._prompt_session:
+            return self._prompt_session.prompt(ANSI(message)).strip()
+        return input(message).strip()
 
     def scan_network(self):
         print(Fore.CYAN + Style.BRIGHT + "\n[SCANNER] Network scanning started...")
@@ -69,8 +98,7 @@ class NetworkAnalyzerSuite:
                 return "Scan aborted"
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"output/scan_results_{timestamp}.json"
-            with open(filename, 'w') as f:
-                json.dump(results, f, indent=2)
+            dump_json(results, filename)
             print(Fore.LIGHTGREEN_EX + Style.BRIGHT + f"✅ Scan completed! {len(results)} device(s) saved to {filename}")
             for device in results:
                 print(Fore.LIGHTWHITE_EX + f"  {device['ip']} - {device['mac']}")
@@ -82,11 +110,16 @@ class NetworkAnalyzerSuite:
     def visualize_topology(self):
         print(Fore.CYAN + Style.BRIGHT + "\n[VISUALIZER] Creating network topology...")
         try:
-            scan_files = [f for f in os.listdir('output') if f.startswith('scan_results_') and f.endswith('.json')]
-            if not scan_files:
+            # Timestamped names sort lexically, so the max name is the latest scan
+            latest_scan = None
+            with os.scandir('output') as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith('scan_results_') and name.endswith('.json') and (latest_scan is None or name > latest_scan):
+                        latest_scan = name
+            if latest_scan is None:
                 print(Fore.RED + Style.BRIGHT + "❌ No scan results found. Please run a network scan first.\n")
                 return "No scan data"
-            latest_scan = sorted(scan_files)[-1]
             filepath = f"output/{latest_scan}"
             with open(filepath, 'r') as f:
                 scan_data = json.load(f)
@@ -127,12 +160,19 @@ class NetworkAnalyzerSuite:
             return "Sniffer error"
 
     def run(self):
-        self.print_header()
         last_action = None
         while True:
             try:
+                # Only repaint the banner on first draw or after a terminal resize
+                terminal_size = shutil.get_terminal_size()
+                if terminal_size != self._terminal_size:
+                    self._terminal_size = terminal_size
+                    self._needs_full_redraw = True
+                if self._needs_full_redraw:
+                    self.print_header()
+                    self._needs_full_redraw = False
                 self.print_main_menu(last_action)
-                choice = input(Fore.LIGHTCYAN_EX + Style.BRIGHT + "Select an option [1-4]: ").strip()
+                choice = self.read_choice(Fore.LIGHTCYAN_EX + Style.BRIGHT + "Select an option [1-4]: " + Style.RESET_ALL)
                 if choice == '1':
                     last_action = self.scan_network()
                 elif choice == '2':
@@ -1,8 +1,34 @@
-import json
+import time
+import select
 import socket
+import struct
+import threading
+import functools
+import ipaddress
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from scapy.all import ARP, Ether, srp, conf
 import netifaces
+from utils.helpers import dump_json
 
+ETH_P_ARP = 0x0806
+ARP_TIMEOUT = 3
+ARP_RETRY = 1
+# Scapy fallback: subnets larger than a /24 are swept in parallel, one /24-sized chunk per worker
+ARP_CHUNK_SIZE = 256
+ARP_MAX_WORKERS = 8
+
+# Offsets into a 42-byte Ethernet + ARP frame
+_ARP_OP_OFFSET = 20
+_ARP_SHA_OFFSET = 22
+_ARP_SPA_OFFSET = 28
+_ARP_THA_OFFSET = 32
+_ARP_TPA_OFFSET = 38
+_ARP_REPLY = b'\x00\x02'
+# How often the receiver checks for the end of the send burst
+_SEND_POLL = 0.05
+
+@functools.lru_cache(maxsize=1)
 def get_default_gateway_subnet():
     gws = netifaces.gateways()
     default_iface = gws.get('default', {}).get(netifaces.AF_INET)
@@ -14,40 +40,182 @@ def get_default_gateway_subnet():
     netmask = ip_info.get("netmask")
     if not ip or not netmask:
         return None
-    # Convert netmask to CIDR
-    mask = sum([bin(int(x)).count('1') for x in netmask.split('.')])
-    subnet = f"{ip}/{mask}"
-    base = subnet.rsplit('.', 1)[0] + ".0/" + str(mask)
-    return base
+    net = ipaddress.IPv4Network(f"{ip}/{netmask}", strict=False)
+    return str(net)
 
 def resolve_domain_to_ips(domain):
+    # ARP only reaches IPv4 hosts, so restrict the lookup to A records
     try:
-        result = socket.gethostbyname_ex(domain)
-        return result[2]
-    except Exception:
+        infos = socket.getaddrinfo(domain, None, socket.AF_INET, socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
         return []
+    return sorted({info[4][0] for info in infos})
 
-def perform_arp_scan(subnet):
-    print(f"Scanning subnet: {subnet}")
+def _select_interface(net):
+    """Pick the interface that owns an address in net, else the default one"""
+    for iface in netifaces.interfaces():
+        for addr in netifaces.ifaddresses(iface).get(netifaces.AF_INET, []):
+            if addr.get('addr') and ipaddress.IPv4Address(addr['addr']) in net:
+                return iface
+    default_iface = netifaces.gateways().get('default', {}).get(netifaces.AF_INET)
+    return default_iface[1] if default_iface else None
+
+def _interface_addresses(iface):
+    """Return (mac_bytes, ip_bytes) for iface, or None if either is missing"""
+    addrs = netifaces.ifaddresses(iface)
+    mac = addrs.get(netifaces.AF_LINK, [{}])[0].get('addr')
+    ip = addrs.get(netifaces.AF_INET, [{}])[0].get('addr')
+    if not mac or not ip:
+        return None
+    return bytes.fromhex(mac.replace(':', '')), socket.inet_aton(ip)
+
+def _build_arp_template(src_mac, src_ip):
+    """Build a broadcast ARP who-has frame; the target IP is patched per host"""
+    return bytearray(
+        b'\xff\xff\xff\xff\xff\xff' + src_mac + struct.pack('!H', ETH_P_ARP) +
+        b'\x00\x01\x08\x00\x06\x04\x00\x01' + src_mac + src_ip +
+        b'\x00\x00\x00\x00\x00\x00' + b'\x00\x00\x00\x00'
+    )
+
+def _receive_arp_replies(sock, src_mac, targets, replies, sent, stop, timeout):
+    """Collect ARP replies addressed to src_mac from any host in targets.
+
+    Like srp(), the timeout only starts once sent is set after the last
+    request goes out; stop aborts the receiver right away.
+    """
+    buf = bytearray(2048)
+    deadline = None
+    while not stop.is_set():
+        if deadline is None and sent.is_set():
+            deadline = time.monotonic() + timeout
+        if deadline is None:
+            wait = _SEND_POLL
+        else:
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                return
+        ready, _, _ = select.select([sock], [], [], wait)
+        if not ready:
+            continue
+        n = sock.recv_into(buf)
+        if n < 42 or buf[12:14] != b'\x08\x06' or buf[_ARP_OP_OFFSET:_ARP_OP_OFFSET + 2] != _ARP_REPLY:
+            continue
+        if buf[_ARP_THA_OFFSET:_ARP_THA_OFFSET + 6] != src_mac:
+            continue
+        (psrc,) = struct.unpack_from('!I', buf, _ARP_SPA_OFFSET)
+        if psrc in targets and psrc not in replies:
+            replies[psrc] = bytes(buf[_ARP_SHA_OFFSET:_ARP_SHA_OFFSET + 6])
+
+def _raw_arp_scan(targets, iface, timeout=ARP_TIMEOUT, retry=ARP_RETRY):
+    """ARP sweep of integer IPv4 targets over one AF_PACKET socket, bypassing Scapy"""
+    addresses = _interface_addresses(iface)
+    if addresses is None:
+        raise OSError(f"interface {iface} has no MAC/IPv4 address")
+    src_mac, src_ip = addresses
+    frame = _build_arp_template(src_mac, src_ip)
+    target_set = set(targets)
+    replies = {}
+
+    with socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP)) as sock:
+        sock.bind((iface, ETH_P_ARP))
+        for _ in range(retry + 1):
+            pending = [t for t in targets if t not in replies]
+            if not pending:
+                break
+            sent = threading.Event()
+            stop = threading.Event()
+            receiver = threading.Thread(
+                target=_receive_arp_replies,
+                args=(sock, src_mac, target_set, replies, sent, stop, timeout),
+                daemon=True
+            )
+            receiver.start()
+            try:
+                for target in pending:
+                    struct.pack_into('!I', frame, _ARP_TPA_OFFSET, target)
+                    sock.send(frame)
+            except BaseException:
+                # e.g. ENOBUFS mid-burst: don't leave the receiver on a closed socket
+                stop.set()
+                raise
+            finally:
+                sent.set()
+                receiver.join()
+
+    return [
+        {'ip': socket.inet_ntoa(struct.pack('!I', ip)), 'mac': mac.hex(':')}
+        for ip, mac in replies.items()
+    ]
+
+def _scapy_arp_scan(pdst, timeout=ARP_TIMEOUT, retry=ARP_RETRY):
+    """Portable ARP sweep through Scapy's srp() for platforms without AF_PACKET"""
     # Disable verbose in scapy
     conf.verb = 0
-    arp = ARP(pdst=subnet)
+    arp = ARP(pdst=pdst)
     ether = Ether(dst="ff:ff:ff:ff:ff:ff")
     packet = ether/arp
-    result = srp(packet, timeout=3, retry=1)[0]
+    result = srp(packet, timeout=timeout, retry=retry)[0]
     devices = []
     for sent, received in result:
         devices.append({'ip': received.psrc, 'mac': received.hwsrc})
     return devices
 
+def _scapy_scan_targets(targets):
+    """Scapy fallback sweep of integer IPv4 targets, chunked for large subnets"""
+    if len(targets) <= ARP_CHUNK_SIZE:
+        return _scapy_arp_scan([str(ipaddress.IPv4Address(t)) for t in targets])
+
+    # srp() slows down as its pending-reply list grows, so sweep /24-sized
+    # chunks concurrently instead of handing it the whole subnet at once
+    chunks = [targets[i:i + ARP_CHUNK_SIZE] for i in range(0, len(targets), ARP_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=ARP_MAX_WORKERS) as pool:
+        results = pool.map(
+            lambda chunk: _scapy_arp_scan([str(ipaddress.IPv4Address(t)) for t in chunk]),
+            chunks
+        )
+        devices = []
+        seen = set()
+        for device in chain.from_iterable(results):
+            key = (device['ip'], device['mac'])
+            if key not in seen:
+                seen.add(key)
+                devices.append(device)
+    return devices
+
+def perform_arp_scan(subnet):
+    print(f"Scanning subnet: {subnet}")
+    try:
+        net = ipaddress.IPv4Network(subnet, strict=False)
+    except ValueError:
+        # Not a literal IPv4 network (e.g. a hostname); let Scapy resolve it
+        return _scapy_arp_scan(subnet)
+    targets = [int(host) for host in net.hosts()] or [int(net.network_address)]
+    if not hasattr(socket, 'AF_PACKET'):
+        return _scapy_scan_targets(targets)
+
+    iface = _select_interface(net)
+    if iface:
+        # One socket sweeps every target with a single receive deadline per pass
+        try:
+            return _raw_arp_scan(targets, iface)
+        except OSError as e:
+            print(f"Raw ARP scan unavailable ({e}), falling back to Scapy")
+    return _scapy_scan_targets(targets)
+
 def scan_network_menu():
     print("Scan Mode:")
     print("1. Auto-detect local network")
     print("2. Enter IP range/subnet manually")
     print("3. Enter domain name to scan")
-    choice = input("Choice (1-3): ").strip()
+    print("4. Re-detect local network (after switching networks)")
+    choice = input("Choice (1-4): ").strip()
     scan_targets = []
 
+    if choice == "4":
+        # Interface lookups are cached for the session; drop them and re-detect
+        get_default_gateway_subnet.cache_clear()
+        choice = "1"
+
     if choice == "1":
         subnet = get_default_gateway_subnet()
         if subnet:
@@ -80,8 +248,7 @@ def scan_network_menu():
 
     ts = __import__('datetime').datetime.now().strftime("%Y%m%d_%H%M%S")
     result_file = f"output/scan_results_{ts}.json"
-    with open(result_file, "w") as f:
-        json.dump(all_devices, f, indent=2)
+    dump_json(all_devices, result_file)
     print(f"Scan completed. {len(all_devices)} device(s) found.")
     print(f"Results saved to {result_file}")
 
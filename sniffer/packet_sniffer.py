@@ -5,8 +5,16 @@ Captures and analyzes live network traffic with advanced features
 """
 
 import os
-import json
+import sys
+import time
+import queue
+import select
+import socket
+import struct
+import atexit
+import functools
 import logging
+import logging.handlers
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -19,6 +27,93 @@ except ImportError:
     print("Scapy not installed. Install with: pip install scapy")
     exit(1)
 
+try:
+    from utils.helpers import dump_json
+except ImportError:
+    # Run directly as a script, without the project root on sys.path
+    import json
+
+    def dump_json(data: Any, filename: str):
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+
+# Default kernel-side BPF filter: only traffic packet_handler classifies in detail
+DEFAULT_BPF_FILTER = "tcp port 80 or tcp port 443 or udp port 53 or icmp or arp"
+
+ICMP_TYPE_NAMES = {0: "Echo Reply", 3: "Dest Unreachable", 8: "Echo Request", 11: "Time Exceeded"}
+
+# Per-protocol counters are kept in a fixed list indexed by these constants
+PROTOCOLS = ('TCP', 'UDP', 'ICMP', 'Other')
+_TCP, _UDP, _ICMP, _OTHER = range(len(PROTOCOLS))
+# Seconds between live statistics tables while sniffing
+STATS_INTERVAL = 1.0
+
+ETH_P_ALL = 0x0003
+# raw_packet_handler parses Ethernet headers, which Linux also fakes on loopback
+_ARPHRD_ETHER, _ARPHRD_LOOPBACK = 1, 772
+_LINKTYPE_ETHERNET = 1
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_VLAN = 0x8100
+_IPPROTO_ICMP, _IPPROTO_TCP, _IPPROTO_UDP = 1, 6, 17
+# UDP ports Scapy binds its DNS layer to (DNS, mDNS, LLMNR)
+_DNS_PORTS = frozenset((53, 5353, 5355))
+_HTTP_PREFIXES = (b'GET', b'POST', b'HEAD', b'PUT', b'HTTP')
+# Only this much of the payload is searched for the end of the first line
+_HTTP_LINE_LIMIT = 256
+
+def _http_request_line(load: bytes) -> Optional[str]:
+    """Return the first line of an HTTP payload, or None if it isn't HTTP"""
+    if not load.startswith(_HTTP_PREFIXES):
+        return None
+    end = load.find(b'\r\n', 0, _HTTP_LINE_LIMIT)
+    return load[:end if end != -1 else _HTTP_LINE_LIMIT].decode('latin-1', 'ignore')
+
+@functools.lru_cache(maxsize=1)
+def default_bpf_filter() -> Optional[str]:
+    """DEFAULT_BPF_FILTER if it compiles here (needs tcpdump/libpcap), else None"""
+    try:
+        from scapy.arch.common import compile_filter
+        compile_filter(DEFAULT_BPF_FILTER)
+    except Exception as e:
+        print(f"Default filter unavailable ({e}), capturing all traffic")
+        return None
+    return DEFAULT_BPF_FILTER
+
+def build_port_filter(ports):
+    """Build a BPF expression matching any of the given ports"""
+    return ' or '.join(f"port {int(p)}" for p in ports)
+
+_log_listener = None
+# Path of the one log file the sniffer logger writes to
+_log_path = None
+
+def _configure_logging(log_file: str) -> logging.Logger:
+    """Attach queued file/console handlers to the sniffer logger, once per process"""
+    global _log_listener, _log_path
+    logger = logging.getLogger("sniffer")
+    if logger.handlers:
+        return logger
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    stream_handler = logging.StreamHandler()
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    # The sniff loop only enqueues records; file and console I/O run on the
+    # listener thread
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    _log_path = log_file
+    return logger
+
 class PacketSniffer:
     """Network packet sniffer class"""
 
@@ -27,159 +122,297 @@ class PacketSniffer:
         self.log_file = log_file
         self.packet_count = 0
         self.running = False
-        self.protocol_stats = {
-            'TCP': 0,
-            'UDP': 0,
-            'ICMP': 0,
-            'Other': 0
-        }
-        self.captured_packets = []
+        self._protocol_counts = [0] * len(PROTOCOLS)
+        self._last_stats = 0
+        self.pcap_file = None
+        self._pcap_writer = None
         self.setup_logging()
 
     def setup_logging(self):
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.log_file),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = _configure_logging(self.log_file)
+        if self.log_file != _log_path:
+            # Logging is configured once per process; report where records really go
+            self.logger.warning("Logging already configured; using %s instead of %s", _log_path, self.log_file)
+            self.log_file = _log_path
+        self._log_info = self.logger.isEnabledFor(logging.INFO)
+
+    @property
+    def protocol_stats(self) -> Dict[str, int]:
+        return dict(zip(PROTOCOLS, self._protocol_counts))
+
+    def flush_logs(self):
+        """Wait for queued log records to be written, then resume the listener"""
+        if _log_listener is not None:
+            _log_listener.stop()
+            _log_listener.start()
 
     def get_available_interfaces(self):
         try:
             return scapy.get_if_list()
         except Exception as e:
-            self.logger.error(f"Error getting interfaces: {e}")
+            self.logger.error("Error getting interfaces: %s", e)
             return []
 
-    def packet_handler(self, packet):
+    # Layer classes are bound as defaults so the hot path reads them as locals
+    # instead of doing a global lookup per packet
+    def packet_handler(self, packet, _IP=IP, _TCP=TCP, _UDP=UDP, _ICMP=ICMP, _DNS=DNS):
         self.packet_count += 1
         proto = "Other"
         summary = ""
-        # IP Layer Handling
-        if packet.haslayer(IP):
-            ip = packet[IP]
-            src_ip = ip.src
-            dst_ip = ip.dst
-            if packet.haslayer(TCP):
-                proto = "TCP"
-                self.protocol_stats['TCP'] += 1
-                tcp = packet[TCP]
-                summary = f"TCP {src_ip}:{tcp.sport} -> {dst_ip}:{tcp.dport}"
-                if tcp.dport == 80 or tcp.sport == 80:
-                    if packet.haslayer('Raw'):
-                        try:
-                            data = packet['Raw'].load.decode(errors='ignore')
-                            if any(method in data for method in ['GET', 'POST', 'HTTP']):
-                                summary += " [HTTP] " + data.splitlines()[0]
-                        except Exception:
-                            pass
-                if tcp.dport == 443 or tcp.sport == 443:
-                    summary += " [HTTPS]"
-            elif packet.haslayer(UDP):
-                proto = "UDP"
-                self.protocol_stats['UDP'] += 1
-                udp = packet[UDP]
-                summary = f"UDP {src_ip}:{udp.sport} -> {dst_ip}:{udp.dport}"
-                if packet.haslayer(DNS):
-                    summary += " [DNS Query]"
-            elif packet.haslayer(ICMP):
-                proto = "ICMP"
-                self.protocol_stats['ICMP'] += 1
-                icmp = packet[ICMP]
-                icmp_types = {0: "Echo Reply", 3: "Dest Unreachable", 8: "Echo Request", 11: "Time Exceeded"}
-                summary = f"ICMP {src_ip} -> {dst_ip} Type: {icmp.type} ({icmp_types.get(icmp.type, '')})"
-            else:
-                self.protocol_stats['Other'] += 1
-                summary = f"{src_ip} -> {dst_ip} (Other Protocol)"
+        # Resolve each layer once; every haslayer()/[Layer] call re-walks the stack
+        ip = packet.getlayer(_IP)
+        tcp = udp = icmp = None
+        if ip is not None:
+            src_ip, dst_ip = ip.src, ip.dst
+            tcp = ip.getlayer(_TCP)
+            if tcp is None:
+                udp = ip.getlayer(_UDP)
+                if udp is None:
+                    icmp = ip.getlayer(_ICMP)
+
+        if tcp is not None:
+            proto = "TCP"
+            self._protocol_counts[_TCP] += 1
+            sport, dport = tcp.sport, tcp.dport
+            summary = f"TCP {src_ip}:{sport} -> {dst_ip}:{dport}"
+            if self._log_info and (dport == 80 or sport == 80):
+                load = getattr(tcp.payload, 'load', None)
+                if load:
+                    request_line = _http_request_line(load)
+                    if request_line is not None:
+                        summary += " [HTTP] " + request_line
+            if dport == 443 or sport == 443:
+                summary += " [HTTPS]"
+        elif udp is not None:
+            proto = "UDP"
+            self._protocol_counts[_UDP] += 1
+            summary = f"UDP {src_ip}:{udp.sport} -> {dst_ip}:{udp.dport}"
+            if isinstance(udp.payload, _DNS):
+                summary += " [DNS Query]"
+        elif icmp is not None:
+            proto = "ICMP"
+            self._protocol_counts[_ICMP] += 1
+            summary = f"ICMP {src_ip} -> {dst_ip} Type: {icmp.type} ({ICMP_TYPE_NAMES.get(icmp.type, '')})"
+        elif ip is not None:
+            self._protocol_counts[_OTHER] += 1
+            summary = f"{src_ip} -> {dst_ip} (Other Protocol)"
         else:
-            self.protocol_stats['Other'] += 1
+            self._protocol_counts[_OTHER] += 1
             summary = f"Unknown Packet ({len(packet)} bytes)"
 
-        self.logger.info(f"Packet #{self.packet_count}: {summary}")
+        self._finish_packet(packet, summary)
+
+    def raw_packet_handler(self, frame: bytes):
+        """Classify a raw Ethernet frame with struct, without Scapy dissection"""
+        self.packet_count += 1
+        n = len(frame)
+        offset = 14
+        ethertype = struct.unpack_from('!H', frame, 12)[0] if n >= 14 else None
+        if ethertype == _ETHERTYPE_VLAN and n >= 18:
+            ethertype = struct.unpack_from('!H', frame, 16)[0]
+            offset = 18
+
+        if ethertype != _ETHERTYPE_IPV4 or n < offset + 20:
+            self._protocol_counts[_OTHER] += 1
+            self._finish_packet(frame, f"Unknown Packet ({n} bytes)")
+            return
+
+        ihl = (frame[offset] & 0x0F) * 4
+        total_len, = struct.unpack_from('!H', frame, offset + 2)
+        ip_proto = frame[offset + 9]
+        src_ip = socket.inet_ntoa(frame[offset + 12:offset + 16])
+        dst_ip = socket.inet_ntoa(frame[offset + 16:offset + 20])
+        l4 = offset + ihl
+        # Ethernet padding may trail the IP datagram
+        end = min(n, offset + total_len)
+
+        if ip_proto == _IPPROTO_TCP and end >= l4 + 20:
+            self._protocol_counts[_TCP] += 1
+            sport, dport = struct.unpack_from('!HH', frame, l4)
+            summary = f"TCP {src_ip}:{sport} -> {dst_ip}:{dport}"
+            if self._log_info and (dport == 80 or sport == 80):
+                load = frame[l4 + (frame[l4 + 12] >> 4) * 4:end]
+                if load:
+                    request_line = _http_request_line(load)
+                    if request_line is not None:
+                        summary += " [HTTP] " + request_line
+            if dport == 443 or sport == 443:
+                summary += " [HTTPS]"
+        elif ip_proto == _IPPROTO_UDP and end >= l4 + 8:
+            self._protocol_counts[_UDP] += 1
+            sport, dport = struct.unpack_from('!HH', frame, l4)
+            summary = f"UDP {src_ip}:{sport} -> {dst_ip}:{dport}"
+            if sport in _DNS_PORTS or dport in _DNS_PORTS:
+                summary += " [DNS Query]"
+        elif ip_proto == _IPPROTO_ICMP and end > l4:
+            self._protocol_counts[_ICMP] += 1
+            icmp_type = frame[l4]
+            summary = f"ICMP {src_ip} -> {dst_ip} Type: {icmp_type} ({ICMP_TYPE_NAMES.get(icmp_type, '')})"
+        else:
+            self._protocol_counts[_OTHER] += 1
+            summary = f"{src_ip} -> {dst_ip} (Other Protocol)"
+
+        self._finish_packet(frame, summary)
+
+    def _finish_packet(self, packet, summary):
+        if self._log_info:
+            self.logger.info("Packet #%d: %s", self.packet_count, summary)
         # Colorized output can be added here with ANSI codes if desired
 
-        # Store for potential PCAP saving
-        self.captured_packets.append(packet)
-        if self.packet_count % 10 == 0:
+        # Stream to PCAP instead of holding every packet in memory
+        if self._pcap_writer:
+            self._pcap_writer.write(packet)
+        # Throttle the live stats table by time rather than packet count
+        now = time.monotonic()
+        if now - self._last_stats > STATS_INTERVAL:
+            self._last_stats = now
             self.print_stats()
 
     def print_stats(self):
-        print(f"\nPacket Statistics (Total: {self.packet_count})")
-        print("-" * 40)
-        total = self.packet_count if self.packet_count > 0 else 1
-        for proto, count in self.protocol_stats.items():
-            pc = (count / total) * 100
-            print(f"{proto:6}: {count:4d} packets ({pc:5.1f}%)")
-        print("-" * 40)
+        parts = [f"\nPacket Statistics (Total: {self.packet_count})", "-" * 40]
+        inv = 100.0 / (self.packet_count or 1)
+        for proto, count in zip(PROTOCOLS, self._protocol_counts):
+            pc = count * inv
+            parts.append(f"{proto:6}: {count:4d} packets ({pc:5.1f}%)")
+        parts.append("-" * 40)
+        sys.stdout.write("\n".join(parts) + "\n")
+        sys.stdout.flush()
 
     def start_sniffing(self, count: int = 0, timeout: Optional[int] = None, filter_str: Optional[str] = None, save_pcap: bool = False):
         self.running = True
         self.packet_count = 0
-        self.protocol_stats = dict(TCP=0, UDP=0, ICMP=0, Other=0)
-        self.captured_packets = []
+        self._protocol_counts = [0] * len(PROTOCOLS)
+        self._last_stats = time.monotonic()
+        self.pcap_file = None
+        self._pcap_writer = None
+        raw_sock = self._open_raw_socket(filter_str)
+        if save_pcap:
+            # Raw frames are always Ethernet; Scapy infers the link type itself
+            self.open_pcap_writer(_LINKTYPE_ETHERNET if raw_sock is not None else None)
 
         self.logger.info("=" * 50)
         self.logger.info("PACKET SNIFFING STARTED")
-        self.logger.info(f"Interface: {self.interface or 'Default'}")
-        self.logger.info(f"Filter: {filter_str or 'None'}")
-        self.logger.info(f"Count: {count or 'Unlimited'}")
-        self.logger.info(f"Timeout: {timeout or 'None'}")
+        self.logger.info("Interface: %s", self.interface or 'Default')
+        self.logger.info("Filter: %s", filter_str or 'None')
+        self.logger.info("Count: %s", count or 'Unlimited')
+        self.logger.info("Timeout: %s", timeout or 'None')
         self.logger.info("=" * 50)
 
         print(f"Started sniffing on interface: {self.interface or 'default'}")
         if filter_str:
             print(f"Filter: {filter_str}")
+        if self.pcap_file:
+            print(f"Streaming packets to: {self.pcap_file}")
         print("Capturing packets... Press Ctrl+C to stop")
 
         try:
-            scapy.sniff(
-                iface=self.interface,
-                prn=self.packet_handler,
-                count=count if count > 0 else 0,
-                timeout=timeout,
-                filter=filter_str,
-                store=False
-            )
+            if raw_sock is not None:
+                self._sniff_raw(raw_sock, count, timeout)
+            else:
+                scapy.sniff(
+                    iface=self.interface,
+                    prn=self.packet_handler,
+                    count=count if count > 0 else 0,
+                    timeout=timeout,
+                    filter=filter_str,
+                    store=False
+                )
         except KeyboardInterrupt:
             print("\nSniffing stopped by user")
         except Exception as e:
-            self.logger.error(f"Error during packet sniffing: {e}")
+            self.logger.error("Error during packet sniffing: %s", e)
         finally:
-            self.stop_sniffing(save_pcap)
+            self.stop_sniffing()
+
+    def _open_raw_socket(self, filter_str: Optional[str]):
+        """Open an AF_PACKET capture socket, or None to use Scapy's sniff()"""
+        # With no interface, sniff() listens on all of them, whose link types
+        # may differ; only a single, named interface takes the raw path
+        if not hasattr(socket, 'AF_PACKET') or not self.interface:
+            return None
+        iface = self.interface
+        try:
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        except OSError as e:
+            self.logger.warning("Raw capture unavailable, using Scapy: %s", e)
+            return None
+        try:
+            sock.bind((iface, ETH_P_ALL))
+            hwtype = sock.getsockname()[3]
+            if hwtype not in (_ARPHRD_ETHER, _ARPHRD_LOOPBACK):
+                # tun/WireGuard/PPP deliver bare IP packets, not Ethernet frames
+                sock.close()
+                self.logger.info("Interface %s is not Ethernet (hwtype %d), using Scapy", iface, hwtype)
+                return None
+            if scapy.conf.sniff_promisc:
+                # Match sniff(), which also sees traffic not addressed to this host
+                from scapy.arch.linux import set_promisc
+                set_promisc(sock, iface)
+            if filter_str:
+                from scapy.arch.linux import attach_filter
+                attach_filter(sock, filter_str, iface)
+        except Exception as e:
+            sock.close()
+            self.logger.warning("Raw capture unavailable, using Scapy: %s", e)
+            return None
+        return sock
+
+    def _sniff_raw(self, sock, count: int, timeout: Optional[int]):
+        buf = bytearray(65536)
+        view = memoryview(buf)
+        deadline = time.monotonic() + timeout if timeout else None
+        with sock:
+            while not count or self.packet_count < count:
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                ready, _, _ = select.select([sock], [], [], wait)
+                if ready:
+                    n = sock.recv_into(buf)
+                    self.raw_packet_handler(bytes(view[:n]))
 
-    def stop_sniffing(self, save_pcap=False):
+    def stop_sniffing(self):
         self.running = False
         self.logger.info("=" * 50)
         self.logger.info("PACKET SNIFFING STOPPED")
-        self.logger.info(f"Total packets captured: {self.packet_count}")
-        for protocol, count in self.protocol_stats.items():
+        self.logger.info("Total packets captured: %d", self.packet_count)
+        for protocol, count in zip(PROTOCOLS, self._protocol_counts):
             pc = (count / self.packet_count) * 100 if self.packet_count else 0
-            self.logger.info(f"{protocol}: {count} packets ({pc:.1f}%)")
+            self.logger.info("%s: %d packets (%.1f%%)", protocol, count, pc)
         self.logger.info("=" * 50)
+        self.flush_logs()
         print("\nSniffing session ended")
         self.print_stats()
         print(f"Logs saved to: {self.log_file}")
+        self.close_pcap_writer()
 
-        if save_pcap and self.captured_packets:
-            self.save_to_pcap()
-
-    def save_to_pcap(self):
-        from scapy.utils import wrpcap
+    def open_pcap_writer(self, linktype: Optional[int] = None):
+        from scapy.utils import PcapWriter
         pcap_file = f"output/sniffed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pcap"
         try:
-            wrpcap(pcap_file, self.captured_packets)
-            print(f"Captured packets saved to {pcap_file}")
+            self._pcap_writer = PcapWriter(pcap_file, linktype=linktype, append=False, sync=False)
+            self.pcap_file = pcap_file
+        except Exception as e:
+            print(f"Could not open .pcap: {e}")
+
+    def close_pcap_writer(self):
+        if not self._pcap_writer:
+            return
+        try:
+            self._pcap_writer.close()
+            print(f"Captured packets saved to {self.pcap_file}")
         except Exception as e:
             print(f"Could not save .pcap: {e}")
+        finally:
+            self._pcap_writer = None
 
     def sniff_with_menu(self):
         print("Available interfaces:", ', '.join(self.get_available_interfaces()))
         iface = input("Enter interface (Leave blank for default): ").strip() or None
-        filter_str = input("BPF filter (e.g. tcp, udp, icmp), blank for all: ").strip() or None
+        filter_str = input(f"BPF filter (e.g. tcp, udp, icmp), blank for default ({DEFAULT_BPF_FILTER}), 'all' for everything: ").strip()
+        ports = input("Only these ports (comma-separated, blank to skip): ").strip()
         count = input("Packets to capture (0 for unlimited): ").strip()
         timeout = input("Sniff timeout seconds (0 for unlimited): ").strip()
         save_pcap = input("Save to PCAP file? (y/n): ").lower().strip() == 'y'
@@ -187,6 +420,17 @@ class PacketSniffer:
         pkt_count = int(count) if count.isdigit() else 0
         pkt_timeout = int(timeout) if timeout.isdigit() and int(timeout) > 0 else None
 
+        # Push protocol/port selection into the kernel BPF filter so unwanted
+        # packets never cross into packet_handler
+        if filter_str.lower() == 'all':
+            filter_str = None
+        port_list = [p.strip() for p in ports.split(',') if p.strip().isdigit()]
+        if port_list:
+            port_filter = build_port_filter(port_list)
+            filter_str = f"({filter_str}) and ({port_filter})" if filter_str else port_filter
+        elif filter_str == '':
+            filter_str = default_bpf_filter()
+
         self.interface = iface
         self.start_sniffing(count=pkt_count, timeout=pkt_timeout, filter_str=filter_str, save_pcap=save_pcap)
 
@@ -203,12 +447,11 @@ class PacketSniffer:
             'protocol_statistics': self.protocol_stats,
         }
         try:
-            with open(summary_file, 'w') as f:
-                json.dump(summary, f, indent=2)
+            dump_json(summary, summary_file)
             print(f"Session summary saved to: {summary_file}")
             return summary_file
         except Exception as e:
-            self.logger.error(f"Error saving session summary: {e}")
+            self.logger.error("Error saving session summary: %s", e)
             return None
 
 if __name__ == "__main__":
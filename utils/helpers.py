@@ -5,14 +5,95 @@ Utility functions for formatting, logging, and system operations
 """
 
 import os
+import re
 import sys
 import pwd
+import json
+import time
+import shutil
 import socket
+import fnmatch
 import platform
 import subprocess
 from datetime import datetime
+from contextlib import nullcontext
+from importlib.util import find_spec
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import netifaces
+except ImportError:
+    netifaces = None
+
+def _compute_user():
+    if _IS_WINDOWS:
+        import getpass
+        try:
+            return getpass.getuser()
+        except (OSError, KeyError):
+            return "Unknown"
+    try:
+        return pwd.getpwuid(os.getuid()).pw_name
+    except KeyError:
+        return "Unknown"
+
+# Platform details don't change while the process runs; look them up once
+_SYSTEM = platform.system()
+_IS_WINDOWS = _SYSTEM == 'Windows'
+_RELEASE = platform.release()
+_PYVER = platform.python_version()
+_USER = _compute_user()
+
+# Privileges don't change mid-run either; validate_root_access() fills this in
+_IS_ROOT = None
+_IS_USER_AN_ADMIN = None
+if _IS_WINDOWS:
+    try:
+        import ctypes
+        _IS_USER_AN_ADMIN = ctypes.windll.shell32.IsUserAnAdmin
+    except (ImportError, AttributeError, OSError):
+        pass
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+_MAC_DELETE = str.maketrans('', '', ':-.')
+_IPV4_RE = re.compile(r'([0-9]{1,3})\.([0-9]{1,3})\.([0-9]{1,3})\.([0-9]{1,3})')
+
+# Interface lists rarely change; reuse the last enumeration for this long
+_IFACE_TTL = 60
+_IFACE_CACHE = {'t': 0.0, 'v': None}
+
+# (compiled function, sample arguments) pairs compiled ahead by warm_up_jit()
+_JIT_WARMUPS = []
+
+def maybe_njit(warmup=None, **kw):
+    """Compile with Numba (cached to disk) when installed, else leave as Python.
+
+    warmup is a tuple of sample arguments warm_up_jit() calls the function with.
+    """
+    def decorate(func):
+        # Imported here so modules that only need the other helpers don't
+        # pay Numba's import cost
+        try:
+            from numba import njit
+        except ImportError:
+            return func
+        compiled = njit(cache=True, **kw)(func)
+        if warmup is not None:
+            _JIT_WARMUPS.append((compiled, warmup))
+        return compiled
+    return decorate
+
+def warm_up_jit():
+    """Compile (or load from cache) registered Numba helpers before first use"""
+    while _JIT_WARMUPS:
+        func, args = _JIT_WARMUPS.pop()
+        func(*args)
+
 def print_banner():
     """Print application banner"""
     banner = """
@@ -26,35 +107,35 @@ def print_banner():
     ╚══════════════════════════════════════════════════════════════╝
     """
     print(banner)
-    print(f"    🖥️  System: {platform.system()} {platform.release()}")
-    print(f"    🐍 Python: {platform.python_version()}")
-    print(f"    👤 User: {get_current_user()}")
+    print(f"    🖥️  System: {_SYSTEM} {_RELEASE}")
+    print(f"    🐍 Python: {_PYVER}")
+    print(f"    👤 User: {_USER}")
     print(f"    📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    warm_up_jit()
     print()
 
 def get_current_user():
     """Get current username"""
+    return _USER
+
+def _compute_is_root():
+    if not _IS_WINDOWS:
+        # Check for root on Unix-like systems
+        return os.geteuid() == 0
+    # Check for admin privileges on Windows
+    if _IS_USER_AN_ADMIN is None:
+        return False
     try:
-        if platform.system() == 'Windows':
-            import getpass
-            return getpass.getuser()
-        else:
-            return pwd.getpwuid(os.getuid()).pw_name
-    except:
-        return "Unknown"
+        return bool(_IS_USER_AN_ADMIN())
+    except OSError:
+        return False
 
 def validate_root_access():
-    """Check if running with root/admin privileges"""
-    try:
-        if platform.system() == 'Windows':
-            # Check for admin privileges on Windows
-            import ctypes
-            return ctypes.windll.shell32.IsUserAnAdmin()
-        else:
-            # Check for root on Unix-like systems
-            return os.geteuid() == 0
-    except:
-        return False
+    """Check if running with root/admin privileges (checked once per process)"""
+    global _IS_ROOT
+    if _IS_ROOT is None:
+        _IS_ROOT = _compute_is_root()
+    return _IS_ROOT
 
 def create_directories(directories: List[str]):
     """Create directories if they don't exist"""
@@ -75,11 +156,11 @@ def check_dependencies():
 
     missing_packages = []
 
+    # find_spec locates the package without running its (slow) top-level code
     for package_name, import_name in required_packages.items():
-        try:
-            __import__(import_name)
+        if find_spec(import_name) is not None:
             print(f"✅ {package_name}: Installed")
-        except ImportError:
+        else:
             print(f"❌ {package_name}: Not installed")
             missing_packages.append(package_name)
 
@@ -93,44 +174,47 @@ def check_dependencies():
 
 def get_system_info():
     """Get comprehensive system information"""
+    hostname = socket.gethostname()
     info = {
-        'system': platform.system(),
-        'release': platform.release(),
+        'system': _SYSTEM,
+        'release': _RELEASE,
         'version': platform.version(),
         'machine': platform.machine(),
         'processor': platform.processor(),
-        'python_version': platform.python_version(),
-        'hostname': socket.gethostname(),
-        'user': get_current_user(),
+        'python_version': _PYVER,
+        'hostname': hostname,
+        'user': _USER,
         'timestamp': datetime.now().isoformat()
     }
 
     # Add network interface information
     try:
-        info['local_ip'] = socket.gethostbyname(socket.gethostname())
-    except:
+        info['local_ip'] = socket.gethostbyname(hostname)
+    except (OSError, UnicodeError):
         info['local_ip'] = 'Unknown'
 
     return info
 
 def format_mac_address(mac: str) -> str:
     """Format MAC address with consistent formatting"""
-    # Remove any existing separators and convert to uppercase
-    mac_clean = mac.replace(':', '').replace('-', '').replace('.', '').upper()
+    # Remove any existing separators
+    mac_clean = mac.translate(_MAC_DELETE)
 
     # Add colons every 2 characters
     if len(mac_clean) == 12:
-        return ':'.join([mac_clean[i:i+2] for i in range(0, 12, 2)])
-    else:
-        return mac  # Return original if invalid format
+        try:
+            return bytes.fromhex(mac_clean).hex(':').upper()
+        except ValueError:
+            pass
+    return mac  # Return original if invalid format
 
 def format_bytes(bytes_count: int) -> str:
     """Format bytes into human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_count < 1024.0:
-            return f"{bytes_count:.1f} {unit}"
-        bytes_count /= 1024.0
-    return f"{bytes_count:.1f} PB"
+    if bytes_count < 1024:
+        return f"{bytes_count:.1f} B"
+    # Each unit is 2**10 of the previous one, so the bit length picks the unit
+    idx = min((int(bytes_count).bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{bytes_count / (1 << (idx * 10)):.1f} {_BYTE_UNITS[idx]}"
 
 def format_duration(seconds: float) -> str:
     """Format duration in seconds to human readable format"""
@@ -144,52 +228,48 @@ def format_duration(seconds: float) -> str:
         return f"{hours:.1f}h"
 
 def validate_ip_address(ip: str) -> bool:
-    """Validate IP address format"""
-    try:
-        socket.inet_aton(ip)
-        return True
-    except socket.error:
-        return False
+    """Validate IP address format (dotted-quad IPv4)"""
+    m = _IPV4_RE.fullmatch(ip)
+    return m is not None and all(int(octet) < 256 for octet in m.groups())
 
 def validate_network_range(network: str) -> bool:
     """Validate network range in CIDR notation"""
-    try:
-        if '/' not in network:
-            return False
+    ip, sep, prefix = network.partition('/')
+    if not sep:
+        return False
 
-        ip, prefix = network.split('/')
+    # Validate prefix
+    if not (prefix.isdecimal() and 0 <= int(prefix) <= 32):
+        return False
 
-        # Validate IP
-        if not validate_ip_address(ip):
-            return False
+    # Validate IP
+    return validate_ip_address(ip)
 
-        # Validate prefix
-        prefix = int(prefix)
-        if not (0 <= prefix <= 32):
-            return False
-
-        return True
-    except:
-        return False
+def invalidate_interface_cache():
+    """Force the next get_network_interfaces() call to re-enumerate"""
+    _IFACE_CACHE['t'] = 0.0
+    _IFACE_CACHE['v'] = None
 
 def get_network_interfaces():
-    """Get list of network interfaces"""
+    """Get list of network interfaces (cached for _IFACE_TTL seconds)"""
+    now = time.monotonic()
+    if _IFACE_CACHE['v'] is not None and now - _IFACE_CACHE['t'] < _IFACE_TTL:
+        return list(_IFACE_CACHE['v'])
+
     interfaces = []
 
     try:
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Windows method
-            import subprocess
             result = subprocess.run(['ipconfig', '/all'], 
                                   capture_output=True, text=True)
             # Parse Windows ipconfig output (simplified)
             interfaces = ['Local Area Connection', 'Wi-Fi', 'Ethernet']
         else:
             # Unix-like systems
-            try:
-                import netifaces
+            if netifaces is not None:
                 interfaces = netifaces.interfaces()
-            except ImportError:
+            else:
                 # Fallback method
                 result = subprocess.run(['ip', 'link', 'show'], 
                                       capture_output=True, text=True)
@@ -198,16 +278,16 @@ def get_network_interfaces():
                     if ': ' in line and 'state' in line:
                         interface_name = line.split(': ')[1].split('@')[0]
                         interfaces.append(interface_name)
-    except:
+    except (OSError, subprocess.SubprocessError):
         interfaces = ['eth0', 'wlan0', 'lo']  # Common defaults
 
+    _IFACE_CACHE['t'] = now
+    _IFACE_CACHE['v'] = list(interfaces)
     return interfaces
 
 def save_json_safely(data: Any, filename: str) -> bool:
     """Safely save data to JSON file with error handling"""
     try:
-        import json
-
         # Create directory if it doesn't exist
         directory = os.path.dirname(filename)
         if directory:
@@ -216,8 +296,20 @@ def save_json_safely(data: Any, filename: str) -> bool:
         # Write JSON with backup
         backup_filename = f"{filename}.backup"
 
-        with open(backup_filename, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        if orjson is not None:
+            # Serialize in C and hand the whole payload to the kernel at once
+            payload = orjson.dumps(data, default=str,
+                                   option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            fd = os.open(backup_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+        else:
+            with open(backup_filename, 'w') as f:
+                json.dump(data, f, indent=2, default=str)
 
         # If backup successful, replace original
         os.replace(backup_filename, filename)
@@ -229,11 +321,18 @@ def save_json_safely(data: Any, filename: str) -> bool:
         print(f"❌ Error saving JSON file {filename}: {e}")
         return False
 
+def dump_json(data: Any, filename: str):
+    """Write data to filename as indented JSON, using orjson when available"""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+
 def load_json_safely(filename: str) -> Optional[Any]:
     """Safely load JSON file with error handling"""
     try:
-        import json
-
         if not os.path.exists(filename):
             print(f"⚠️  File not found: {filename}")
             return None
@@ -260,7 +359,6 @@ def create_backup(filename: str) -> bool:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_filename = f"{filename}.backup_{timestamp}"
 
-        import shutil
         shutil.copy2(filename, backup_filename)
 
         print(f"💾 Backup created: {backup_filename}")
@@ -273,23 +371,29 @@ def create_backup(filename: str) -> bool:
 def cleanup_old_files(directory: str, pattern: str, max_age_days: int = 7):
     """Clean up old files based on age"""
     try:
-        import glob
-        import time
-
-        pattern_path = os.path.join(directory, pattern)
-        files = glob.glob(pattern_path)
-
         current_time = time.time()
         max_age_seconds = max_age_days * 24 * 60 * 60
 
+        # DirEntry carries the directory listing's stat data, so each match
+        # costs one stat instead of glob's listing plus getmtime
         cleaned_count = 0
-        for file_path in files:
-            file_age = current_time - os.path.getmtime(file_path)
-
-            if file_age > max_age_seconds:
-                os.remove(file_path)
-                cleaned_count += 1
-                print(f"🗑️  Removed old file: {os.path.basename(file_path)}")
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            entries = nullcontext(())  # Like glob, a missing directory has no matches
+        with entries as listing:
+            for entry in listing:
+                # Like glob, skip hidden files unless the pattern asks for them
+                if entry.name.startswith('.') and not pattern.startswith('.'):
+                    continue
+                if not fnmatch.fnmatch(entry.name, pattern) or not entry.is_file():
+                    continue
+
+                file_age = current_time - entry.stat().st_mtime
+                if file_age > max_age_seconds:
+                    os.remove(entry.path)
+                    cleaned_count += 1
+                    print(f"🗑️  Removed old file: {entry.name}")
 
         if cleaned_count > 0:
             print(f"✅ Cleaned up {cleaned_count} old files")
@@ -331,16 +435,58 @@ def get_file_info(filename: str) -> Dict[str, Any]:
 
 def test_network_connectivity(host: str = "8.8.8.8", timeout: int = 5) -> bool:
     """Test network connectivity"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        try:
+            s.connect((host, 53))
+        except OSError:
+            return False
+    return True
+
+def _ephemeral_port_range():
+    """Port range the kernel hands out for bind((host, 0))"""
     try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, 53))
-        return True
-    except socket.error:
-        return False
+        with open('/proc/sys/net/ipv4/ip_local_port_range') as f:
+            low, high = f.read().split()
+        return int(low), int(high)
+    except (OSError, ValueError):
+        return 49152, 65535  # IANA dynamic range, used by Windows and macOS
+
+_EPHEMERAL_PORTS = _ephemeral_port_range()
+
+def _kernel_assigned_ports(start_port: int, end_port: int, host: str) -> List[int]:
+    """Let the kernel pick free ephemeral ports, keeping those in range"""
+    available_ports = []
+    sockets = []
+
+    # Sockets stay bound until the end so each port is handed out once
+    try:
+        for _ in range(10):  # Limit results
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sockets.append(s)
+            s.bind((host, 0))
+            port = s.getsockname()[1]
+            if start_port <= port <= end_port:
+                available_ports.append(port)
+    except OSError:
+        pass
+    finally:
+        for s in sockets:
+            s.close()
+
+    return sorted(available_ports)
 
 def get_available_ports(start_port: int = 1024, end_port: int = 65535, 
                        host: str = 'localhost') -> List[int]:
     """Get list of available (unused) ports"""
+    # Asking the kernel is cheaper than probing, but it only ever returns
+    # ephemeral ports, so use it only when that range overlaps the request
+    low, high = _EPHEMERAL_PORTS
+    if start_port <= high and low <= end_port:
+        available_ports = _kernel_assigned_ports(start_port, end_port, host)
+        if available_ports:
+            return available_ports
+
     available_ports = []
 
     for port in range(start_port, min(start_port + 100, end_port)):  # Limit check
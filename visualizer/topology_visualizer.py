@@ -5,18 +5,62 @@ Advanced: Device types, labels, gateway highlight, multiple exports, statistics/
 """
 
 import os
+import re
+import contextlib
+import socket
+import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 try:
+    import numpy as np
     import networkx as nx
     import matplotlib.pyplot as plt
     import matplotlib.patches as patches
     from matplotlib.patches import FancyBboxPatch
+    from matplotlib.collections import LineCollection
 except ImportError:
     print("Required packages not installed. Install with: pip install networkx matplotlib")
     exit(1)
 
+try:
+    from utils.helpers import maybe_njit
+except ImportError:
+    # Run directly as a script, without the project root on sys.path
+    def maybe_njit(warmup=None, **kw):
+        return lambda func: func
+
+VM_KEYWORDS = ('vmware', 'virtualbox', 'hyper-v')
+KNOWN_VENDORS = ('apple', 'samsung', 'google', 'intel', 'hp', 'dell')
+# One case-insensitive alternation per category scans a vendor string once
+_VM_RE = re.compile('|'.join(map(re.escape, VM_KEYWORDS)), re.I)
+_KNOWN_RE = re.compile('|'.join(map(re.escape, KNOWN_VENDORS)), re.I)
+
+# Integer node-type codes used by the batched classifier; they index NODE_TYPES
+NODE_TYPES = ('gateway', 'local', 'vm', 'device', 'unknown')
+_GATEWAY, _LOCAL, _VM, _DEVICE, _UNKNOWN = range(len(NODE_TYPES))
+
+# gethostbyname can block on DNS, so the local address lookup is cached
+_LOCAL_IPS_TTL = 60
+_LOCAL_IPS_CACHE = {'t': 0.0, 'v': None}
+
+def _vendor_class(vendor):
+    if _VM_RE.search(vendor):
+        return _VM
+    if _KNOWN_RE.search(vendor):
+        return _DEVICE
+    return _UNKNOWN
+
+def _classify_kernel(is_gateway, is_local, vendor_class):
+    # Gateway wins over local, which wins over the vendor-derived class
+    return np.where(is_gateway, _GATEWAY, np.where(is_local, _LOCAL, vendor_class))
+
+@maybe_njit(warmup=(1, 2.0))
+def _circular_positions(n, r):
+    # Vectorized so it stays fast as plain NumPy when Numba isn't installed
+    angles = np.arange(n) * (2 * np.pi / n)
+    return r * np.cos(angles), r * np.sin(angles)
+
 class TopologyVisualizer:
     """Network topology visualization class with advanced features"""
 
@@ -36,36 +80,40 @@ class TopologyVisualizer:
     def create_graph_from_scan_data(self, scan_data: List[Dict[str, Any]]) -> nx.Graph:
         G = nx.Graph()
         gateway_ip = self.detect_gateway(scan_data)
-        G.add_node(gateway_ip, node_type='gateway', ip=gateway_ip, mac='Gateway', label=f'Gateway\n{gateway_ip}')
+        nodes = [(gateway_ip, {'node_type': 'gateway', 'ip': gateway_ip, 'mac': 'Gateway', 'label': f'Gateway\n{gateway_ip}'})]
         local_ips = self.detect_local_ips()
-        for device in scan_data:
+        node_codes = self.classify_devices(scan_data, gateway_ip, local_ips)
+        for device, code in zip(scan_data, node_codes):
             ip = device['ip']
             mac = device['mac']
             vendor = device.get('vendor', 'Unknown')
-            node_type = self.classify_device(ip, mac, vendor, gateway_ip, local_ips)
             label = f"{ip}\n{vendor}\n{mac[:8]}...".strip()
-            G.add_node(ip, ip=ip, mac=mac, vendor=vendor, node_type=node_type, label=label)
-            G.add_edge(gateway_ip, ip)
+            nodes.append((ip, {'ip': ip, 'mac': mac, 'vendor': vendor, 'node_type': NODE_TYPES[code], 'label': label}))
+        # Bulk inserts instead of one add_node/add_edge call per device
+        G.add_nodes_from(nodes)
+        G.add_edges_from((gateway_ip, device['ip']) for device in scan_data)
         return G
 
     def detect_gateway(self, scan_data):
         # Look for .1 in IP range or use first IP as fallback
         if scan_data:
             first = scan_data[0]['ip']
-            base = '.'.join(first.split('.')[:3])
-            candidate = f"{base}.1"
-            all_ips = [d['ip'] for d in scan_data]
-            return candidate if candidate in all_ips else all_ips[0]
+            candidate = first.rsplit('.', 1)[0] + '.1'
+            for d in scan_data:
+                if d['ip'] == candidate:
+                    return candidate
+            return first
         return "192.168.1.1"
 
     def detect_local_ips(self):
-        import socket
+        now = time.monotonic()
+        if _LOCAL_IPS_CACHE['v'] is not None and now - _LOCAL_IPS_CACHE['t'] < _LOCAL_IPS_TTL:
+            return list(_LOCAL_IPS_CACHE['v'])
         local_ips = []
-        try:
-            hostname = socket.gethostname()
-            local_ips.append(socket.gethostbyname(hostname))
-        except Exception:
-            pass
+        with contextlib.suppress(OSError, UnicodeError):
+            local_ips.append(socket.gethostbyname(socket.gethostname()))
+        _LOCAL_IPS_CACHE['t'] = now
+        _LOCAL_IPS_CACHE['v'] = list(local_ips)
         return local_ips
 
     def classify_device(self, ip, mac, vendor, gateway_ip, local_ips):
@@ -73,13 +121,24 @@ class TopologyVisualizer:
             return 'gateway'
         if ip in local_ips:
             return 'local'
-        vm_keywords = ['vmware', 'virtualbox', 'hyper-v']
-        if any(vm_kw in vendor.lower() for vm_kw in vm_keywords):
-            return 'vm'
-        known_vendors = ['apple', 'samsung', 'google', 'intel', 'hp', 'dell']
-        if any(v in vendor.lower() for v in known_vendors):
-            return 'device'
-        return 'unknown'
+        return NODE_TYPES[_vendor_class(vendor)]
+
+    def classify_devices(self, scan_data, gateway_ip, local_ips) -> List[int]:
+        """Classify every device at once, returning codes that index NODE_TYPES"""
+        local_set = set(local_ips)
+        ips = [device['ip'] for device in scan_data]
+        # Vendor strings repeat heavily across a scan; classify each one once
+        class_by_vendor = {}
+        vendor_class = []
+        for device in scan_data:
+            vendor = device.get('vendor', 'Unknown')
+            code = class_by_vendor.get(vendor)
+            if code is None:
+                code = class_by_vendor[vendor] = _vendor_class(vendor)
+            vendor_class.append(code)
+        is_gateway = np.array([ip == gateway_ip for ip in ips], dtype=np.bool_)
+        is_local = np.array([ip in local_set for ip in ips], dtype=np.bool_)
+        return _classify_kernel(is_gateway, is_local, np.array(vendor_class, dtype=np.int64)).tolist()
 
     def setup_plot_style(self, theme='default'):
         if theme != 'default':
@@ -97,11 +156,8 @@ class TopologyVisualizer:
             center = gateway[0]
             pos[center] = (0, 0)
             nodes = [n for n in G.nodes if n != center]
-            import math
-            r = 2
-            for i, node in enumerate(nodes):
-                theta = 2 * math.pi * i / len(nodes)
-                pos[node] = (r * math.cos(theta), r * math.sin(theta))
+            xs, ys = _circular_positions(len(nodes), 2.0)
+            pos.update(zip(nodes, zip(xs.tolist(), ys.tolist())))
         else:
             pos = nx.spring_layout(G, seed=42, k=0.5)
         return pos
@@ -110,12 +166,25 @@ class TopologyVisualizer:
         self.setup_plot_style(theme)
         fig, ax = plt.subplots(1, 1, figsize=self.figure_size)
         pos = self.calculate_node_positions(G)
-        node_colors = [self.node_colors.get(G.nodes[n].get('node_type', 'unknown'), '#888') for n in G.nodes()]
-        node_sizes = [2600 if G.nodes[n].get('node_type') == 'gateway' else 1500 for n in G.nodes()]
-        nx.draw_networkx_edges(G, pos, edge_color='#999', width=1.6, alpha=0.6, ax=ax)
-        nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=node_sizes, alpha=0.8, ax=ax)
-        labels = {n: G.nodes[n].get('label', n) for n in G.nodes}
-        nx.draw_networkx_labels(G, pos, labels=labels, font_size=8, font_weight='bold', ax=ax)
+        # One pass over the node attribute dicts gathers positions, types and labels
+        coords, node_types, labels = [], [], []
+        for n, d in G.nodes(data=True):
+            coords.append(pos[n])
+            node_types.append(d.get('node_type', 'unknown'))
+            labels.append(d.get('label', n))
+        types = np.array(node_types)
+        node_colors = [self.node_colors.get(t, '#888') for t in node_types]
+        node_sizes = np.where(types == 'gateway', 2600, 1500)
+        xs, ys = np.array(coords, dtype=float).reshape(-1, 2).T
+        # Draw edges and nodes as one collection each rather than through the
+        # nx.draw_networkx_* wrappers
+        segments = np.array([(pos[u], pos[v]) for u, v in G.edges()], dtype=float).reshape(-1, 2, 2)
+        ax.add_collection(LineCollection(segments, colors='#999', linewidths=1.6, alpha=0.6, zorder=1))
+        ax.autoscale_view()
+        ax.scatter(xs, ys, s=node_sizes, c=node_colors, alpha=0.8, zorder=2)
+        for x, y, label in zip(xs, ys, labels):
+            ax.text(x, y, label, fontsize=8, fontweight='bold',
+                    ha='center', va='center', clip_on=True, zorder=3)
         ax.set_title('Network Topology Map', fontsize=16, fontweight='bold', pad=20)
         ax.set_xlabel(f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', fontsize=9)
         self.add_legend(ax)
@@ -123,23 +192,25 @@ class TopologyVisualizer:
         ax.set_yticks([])
         ax.axis('off')
         plt.tight_layout()
+        # Measure the tight bounding box once and reuse it for every export,
+        # instead of letting each savefig(bbox_inches='tight') re-render to measure
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(plt.rcParams['savefig.pad_inches'])
         base, ext = os.path.splitext(output_filename)
         png_path = os.path.join(self.output_dir, output_filename)
-        plt.savefig(png_path, dpi=220, bbox_inches='tight')
+        fig.savefig(png_path, dpi=220, bbox_inches=bbox)
         if export_svg:
-            plt.savefig(os.path.join(self.output_dir, f"{base}.svg"), bbox_inches='tight')
+            fig.savefig(os.path.join(self.output_dir, f"{base}.svg"), bbox_inches=bbox)
         if export_pdf:
-            plt.savefig(os.path.join(self.output_dir, f"{base}.pdf"), bbox_inches='tight')
-        plt.close()
+            fig.savefig(os.path.join(self.output_dir, f"{base}.pdf"), bbox_inches=bbox)
+        plt.close(fig)
         return png_path
 
     def add_legend(self, ax):
-        import matplotlib.patches as mpatches
         legend_elements = []
         for key, color in self.node_colors.items():
             if key != 'unknown':
                 name = key.replace('vm', 'Virtual Machine').capitalize()
-                legend_elements.append(mpatches.Patch(color=color, label=name))
+                legend_elements.append(patches.Patch(color=color, label=name))
         ax.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(0.01, 0.99))
 
     def create_topology(self, scan_data: List[Dict[str, Any]], output_filename: Optional[str] = None,
@@ -173,22 +244,23 @@ class TopologyVisualizer:
         stats = self.generate_network_stats(scan_data)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_file = os.path.join(self.output_dir, f"network_report_{timestamp}.txt")
+        # Assemble the whole report in memory and write it out in one call
+        parts = [
+            "NETWORK TOPOLOGY REPORT\n" + "="*27 + "\n",
+            f"Generated: {datetime.now()}\n",
+            f"Total Devices: {stats['total_devices']}\n",
+        ]
+        if 'ip_range' in stats:
+            parts.append(f"IP Range: {stats['ip_range'].get('first','')} - {stats['ip_range'].get('last','')}\n")
+        parts.append("\nDEVICE DETAILS:\n" + "-"*17 + "\n")
+        parts.extend(f"IP: {d['ip']} | MAC: {d['mac']} | Vendor: {d.get('vendor','Unknown')}\n" for d in scan_data)
+        parts.append("\nVENDOR DISTRIBUTION:\n" + "-"*22 + "\n")
+        parts.extend(f"{v}: {c} device(s)\n" for v, c in stats['vendor_distribution'].items())
+        if extra_stats:
+            parts.append("\nEXTRA STATS:\n" + "-"*15 + "\n")
+            parts.extend(f"{k}: {val}\n" for k, val in extra_stats.items())
         with open(report_file, 'w') as f:
-            f.write("NETWORK TOPOLOGY REPORT\n" + "="*27 + "\n")
-            f.write(f"Generated: {datetime.now()}\n")
-            f.write(f"Total Devices: {stats['total_devices']}\n")
-            if 'ip_range' in stats:
-                f.write(f"IP Range: {stats['ip_range'].get('first','')} - {stats['ip_range'].get('last','')}\n")
-            f.write("\nDEVICE DETAILS:\n" + "-"*17 + "\n")
-            for d in scan_data:
-                f.write(f"IP: {d['ip']} | MAC: {d['mac']} | Vendor: {d.get('vendor','Unknown')}\n")
-            f.write("\nVENDOR DISTRIBUTION:\n" + "-"*22 + "\n")
-            for v, c in stats['vendor_distribution'].items():
-                f.write(f"{v}: {c} device(s)\n")
-            if extra_stats:
-                f.write("\nEXTRA STATS:\n" + "-"*15 + "\n")
-                for k, val in extra_stats.items():
-                    f.write(f"{k}: {val}\n")
+            f.write(''.join(parts))
         print(f"Detailed report saved as: {report_file}")
         return report_file
 